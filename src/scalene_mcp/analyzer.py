@@ -1,5 +1,8 @@
 """Profile analysis and insight extraction for Scalene profiling results."""
 
+import heapq
+from collections.abc import Callable, Iterator
+from operator import attrgetter, itemgetter
 from typing import Any
 
 from .models import (
@@ -9,6 +12,13 @@ from .models import (
     ProfileResult,
 )
 
+# Line metric each hotspot type is ranked by
+_RANK_KEYS: dict[str, Callable[[LineMetrics], float]] = {
+    "cpu": attrgetter("total_cpu_percent"),
+    "memory": attrgetter("memory_peak_mb"),
+    "gpu": attrgetter("gpu_percent"),
+}
+
 
 class ProfileAnalyzer:
     """Analyze profiling results and extract actionable insights."""
@@ -70,19 +80,10 @@ class ProfileAnalyzer:
         Returns:
             List of CPU hotspots sorted by total CPU percentage
         """
-        all_lines: list[tuple[float, str, LineMetrics]] = []
-
-        for filename, file_metrics in profile.files.items():
-            for line in file_metrics.lines:
-                total_cpu = line.total_cpu_percent
-                if total_cpu > 0:
-                    all_lines.append((total_cpu, filename, line))
-
-        # Sort by CPU percentage descending
-        all_lines.sort(key=lambda x: x[0], reverse=True)
+        top_lines = self._ranked(profile, "cpu")[:n]
 
         hotspots: list[Hotspot] = []
-        for total_cpu, filename, line in all_lines[:n]:
+        for total_cpu, filename, line in top_lines:
             severity = "high" if total_cpu > 20 else "medium" if total_cpu > 5 else "low"
             hotspots.append(
                 Hotspot(
@@ -111,18 +112,10 @@ class ProfileAnalyzer:
         Returns:
             List of memory hotspots sorted by peak memory usage
         """
-        all_lines: list[tuple[float, str, LineMetrics]] = []
-
-        for filename, file_metrics in profile.files.items():
-            for line in file_metrics.lines:
-                if line.memory_peak_mb > 0:
-                    all_lines.append((line.memory_peak_mb, filename, line))
-
-        # Sort by peak memory descending
-        all_lines.sort(key=lambda x: x[0], reverse=True)
+        top_lines = self._ranked(profile, "memory")[:n]
 
         hotspots: list[Hotspot] = []
-        for peak_mb, filename, line in all_lines[:n]:
+        for peak_mb, filename, line in top_lines:
             severity = "high" if peak_mb > 100 else "medium" if peak_mb > 10 else "low"
             hotspots.append(
                 Hotspot(
@@ -151,18 +144,10 @@ class ProfileAnalyzer:
         Returns:
             List of GPU hotspots sorted by GPU percentage
         """
-        all_lines: list[tuple[float, str, LineMetrics]] = []
-
-        for filename, file_metrics in profile.files.items():
-            for line in file_metrics.lines:
-                if line.gpu_percent > 0:
-                    all_lines.append((line.gpu_percent, filename, line))
-
-        # Sort by GPU percentage descending
-        all_lines.sort(key=lambda x: x[0], reverse=True)
+        top_lines = self._ranked(profile, "gpu")[:n]
 
         hotspots: list[Hotspot] = []
-        for gpu_percent, filename, line in all_lines[:n]:
+        for gpu_percent, filename, line in top_lines:
             severity = "high" if gpu_percent > 50 else "medium" if gpu_percent > 10 else "low"
             hotspots.append(
                 Hotspot(
@@ -200,6 +185,8 @@ class ProfileAnalyzer:
             "memory": [],
             "gpu": [],
         }
+        check_memory = profile._captured.get("memory", True)
+        check_gpu = profile._captured.get("gpu", True)
 
         for filename, file_metrics in profile.files.items():
             for line in file_metrics.lines:
@@ -222,7 +209,7 @@ class ProfileAnalyzer:
                     )
 
                 # Memory bottlenecks
-                if line.memory_peak_mb >= memory_threshold_mb:
+                if check_memory and line.memory_peak_mb >= memory_threshold_mb:
                     severity = "high" if line.memory_peak_mb > 100 else "medium"
                     bottlenecks["memory"].append(
                         {
@@ -239,7 +226,7 @@ class ProfileAnalyzer:
                     )
 
                 # GPU bottlenecks
-                if line.gpu_percent > 0:
+                if check_gpu and line.gpu_percent > 0:
                     severity = "high" if line.gpu_percent > 50 else "medium"
                     bottlenecks["gpu"].append(
                         {
@@ -256,6 +243,50 @@ class ProfileAnalyzer:
 
         return bottlenecks
 
+    def rank_lines(self, profile: ProfileResult) -> None:
+        """
+        Rank every line by CPU, memory and GPU usage ahead of time.
+
+        Hotspot queries on the profile then only slice the stored rankings.
+
+        Args:
+            profile: The profile result to rank
+        """
+        for metric in _RANK_KEYS:
+            self._ranked(profile, metric)
+
+    def _ranked(
+        self, profile: ProfileResult, metric: str
+    ) -> list[tuple[float, str, LineMetrics]]:
+        """Lines with a nonzero metric, largest first, sorted once per profile."""
+        ranked = profile._rankings.get(metric)
+        if ranked is not None:
+            return ranked
+        if not profile._captured.get(metric, True):
+            # Not collected by this run, so every line is zero
+            ranked = []
+        else:
+            value = _RANK_KEYS[metric]
+            ranked = sorted(
+                (
+                    (v, filename, line)
+                    for filename, line in self._iter_lines(profile)
+                    if (v := value(line)) > 0
+                ),
+                key=itemgetter(0),
+                reverse=True,
+            )
+        profile._rankings[metric] = ranked
+        return ranked
+
+    def _iter_lines(
+        self, profile: ProfileResult
+    ) -> Iterator[tuple[str, LineMetrics]]:
+        """Yield (filename, line) for every profiled line."""
+        for filename, file_metrics in profile.files.items():
+            for line in file_metrics.lines:
+                yield filename, line
+
     def _get_cpu_recommendation(self, line: LineMetrics) -> str:
         """Generate CPU optimization recommendation for a line."""
         recommendations = []
@@ -444,19 +475,17 @@ class ProfileAnalyzer:
         Returns:
             List of function summaries sorted by total CPU percentage
         """
-        all_functions: list[tuple[float, str, FileMetrics]] = []
-
-        for filename, file_metrics in profile.files.items():
-            if file_metrics.total_cpu_percent > 0:
-                all_functions.append(
-                    (file_metrics.total_cpu_percent, filename, file_metrics)
-                )
+        all_functions = (
+            (file_metrics.total_cpu_percent, filename, file_metrics)
+            for filename, file_metrics in profile.files.items()
+            if file_metrics.total_cpu_percent > 0
+        )
 
-        # Sort by CPU percentage descending
-        all_functions.sort(key=lambda x: x[0], reverse=True)
+        # Select top N by CPU percentage
+        top_functions = heapq.nlargest(top_n, all_functions, key=itemgetter(0))
 
         function_summaries: list[dict[str, Any]] = []
-        for total_cpu, filename, file_metrics in all_functions[:top_n]:
+        for total_cpu, filename, file_metrics in top_functions:
             # Calculate total memory from lines
             total_memory = sum(
                 line.memory_peak_mb for line in file_metrics.lines
@@ -0,0 +1,352 @@
+"""Bounded cache for recent profile results.
+
+Profiles are large (per-line metrics for every file), so the server keeps
+only the most recently used ones in memory and drops entries older than a
+TTL. With a spill path configured, every profile is also written, compressed,
+to a SQLite file; profiles pushed out of memory are then reloaded from disk
+on demand, and survive server restarts until their TTL runs out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from pathlib import Path
+from typing import Any
+
+from pydantic_core import from_json
+
+from scalene_mcp import parser
+from scalene_mcp.models import (
+    FileMetrics,
+    LineMetrics,
+    MemoryLeak,
+    ProfileResult,
+    ProfileSummary,
+)
+
+
+def _pack(profile: ProfileResult) -> bytes:
+    """Serialize a profile for the spill file.
+
+    Per-line metrics repeat the same keys and file names thousands of times,
+    so the JSON compresses to a small fraction of its size.
+    """
+    return zlib.compress(profile.model_dump_json().encode())
+
+
+def _pack_row(profile: ProfileResult) -> tuple[bytes, bytes]:
+    """Serialize a profile as the spill table's (head, data) columns.
+
+    The head holds the summary and metadata only, so it is cheap to write
+    and to read back for summary-only callers.
+    """
+    head = zlib.compress(profile.model_dump_json(exclude={"files"}).encode())
+    return head, _pack(profile)
+
+
+def _unpack(data: bytes) -> ProfileResult:
+    """Decode a profile written by ``_pack``.
+
+    Lines and leaks are rebuilt under the parser's trust policy, so values
+    the parser stored without bounds checks reload exactly as stored.
+    """
+    fields = from_json(zlib.decompress(data))
+    if not parser._TRUSTED:
+        return ProfileResult.model_validate(fields)
+    files = {
+        filename: _unpack_file(file_fields)
+        for filename, file_fields in fields.pop("files").items()
+    }
+    summary = _unpack_summary(fields.pop("summary"))
+    return ProfileResult(**fields, summary=summary, files=files)
+
+
+def _unpack_head(head: bytes) -> ProfileResult:
+    """Decode a head column into a profile with empty ``files``."""
+    fields = from_json(zlib.decompress(head))
+    if not parser._TRUSTED:
+        return ProfileResult.model_validate({**fields, "files": {}})
+    summary = _unpack_summary(fields.pop("summary"))
+    return ProfileResult(**fields, summary=summary, files={})
+
+
+def _unpack_file(fields: dict[str, Any]) -> FileMetrics:
+    """Rebuild a file's metrics, constructing lines and leaks unvalidated."""
+    lines = [LineMetrics.model_construct(**line) for line in fields.pop("lines")]
+    leaks = [MemoryLeak.model_construct(**leak) for leak in fields.pop("leaks")]
+    return FileMetrics(**fields, lines=lines, leaks=leaks)
+
+
+def _unpack_summary(fields: dict[str, Any]) -> ProfileSummary:
+    """Rebuild a summary, constructing its leaks unvalidated."""
+    leaks = [
+        MemoryLeak.model_construct(**leak) for leak in fields.pop("detected_leaks")
+    ]
+    return ProfileSummary(**fields, detected_leaks=leaks)
+
+
+class ProfileCache(MutableMapping[str, ProfileResult]):
+    """LRU cache of profiles with a per-entry time-to-live."""
+
+    def __init__(
+        self,
+        maxsize: int = 64,
+        ttl: float = 3600.0,
+        spill_path: Path | str | None = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of profiles kept in memory (oldest used
+                evicted first)
+            ttl: Seconds a profile stays available after it was stored
+            spill_path: Optional SQLite file backing the in-memory entries
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # profile_id -> (expiry deadline, profile), least recently used first
+        self._data: OrderedDict[str, tuple[float, ProfileResult]] = OrderedDict()
+        # Snapshot of live ids, rebuilt after changes or once an entry expires
+        self._ids: tuple[str, ...] | None = None
+        self._ids_expire = 0.0
+        self._db: sqlite3.Connection | None = None
+        if spill_path is not None:
+            spill_path = Path(spill_path)
+            spill_path.parent.mkdir(parents=True, exist_ok=True)
+            # Create the file user-only before SQLite opens it, so profile data
+            # is never readable by others; SQLite gives its journal files the
+            # same mode as the database.
+            os.close(os.open(spill_path, os.O_RDWR | os.O_CREAT, 0o600))
+            spill_path.chmod(0o600)
+            self._db = sqlite3.connect(spill_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS profiles (profile_id TEXT PRIMARY KEY,"
+                " expires REAL NOT NULL, head BLOB NOT NULL, data BLOB NOT NULL)"
+            )
+
+    def __getitem__(self, profile_id: str) -> ProfileResult:
+        now = time.time()
+        entry = self._data.get(profile_id)
+        if entry is None:
+            expires, data = self._fetch(profile_id, "data", now)
+            entry = expires, _unpack(data)
+        return self._touch(profile_id, entry, now)
+
+    def __setitem__(self, profile_id: str, profile: ProfileResult) -> None:
+        row = _pack_row(profile) if self._db is not None else None
+        self._insert(profile_id, profile, row)
+
+    async def aget(self, profile_id: str) -> ProfileResult | None:
+        """
+        Get a profile without blocking the event loop on disk reads.
+
+        Like ``get()``, but a spilled profile is decompressed and validated
+        in a worker thread.
+
+        Args:
+            profile_id: Profile to look up
+
+        Returns:
+            The profile, or None if unknown or expired
+        """
+        now = time.time()
+        entry = self._data.get(profile_id)
+        try:
+            if entry is None:
+                expires, data = self._fetch(profile_id, "data", now)
+                entry = expires, await asyncio.to_thread(_unpack, data)
+            return self._touch(profile_id, entry, now)
+        except KeyError:
+            return None
+
+    async def aset(self, profile_id: str, profile: ProfileResult) -> None:
+        """
+        Store a profile, serializing it for the spill file in a worker thread.
+
+        Args:
+            profile_id: Key to store the profile under
+            profile: Profile to store
+        """
+        row = None
+        if self._db is not None:
+            row = await asyncio.to_thread(_pack_row, profile)
+        self._insert(profile_id, profile, row)
+
+    def __delitem__(self, profile_id: str) -> None:
+        self._ids = None
+        found = self._data.pop(profile_id, None) is not None
+        if self._db is not None:
+            with self._db:
+                cursor = self._db.execute(
+                    "DELETE FROM profiles WHERE profile_id = ?", (profile_id,)
+                )
+            found = found or cursor.rowcount > 0
+        if not found:
+            raise KeyError(profile_id)
+
+    def __contains__(self, profile_id: object) -> bool:
+        if not isinstance(profile_id, str):
+            return False
+        now = time.time()
+        if profile_id in self._data:
+            return self._data[profile_id][0] > now
+        if self._db is None:
+            return False
+        row = self._db.execute(
+            "SELECT 1 FROM profiles WHERE profile_id = ? AND expires > ?",
+            (profile_id, now),
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._live_ids())
+
+    def __len__(self) -> int:
+        return len(self._live_ids())
+
+    def get_head(self, profile_id: str) -> ProfileResult | None:
+        """
+        Get a profile for callers that only read its summary.
+
+        A profile still in memory is returned as is. A spilled one is read
+        back without its per-file line data and is not pulled into memory.
+
+        Args:
+            profile_id: Profile to look up
+
+        Returns:
+            The profile (possibly with empty ``files``), or None if unknown
+        """
+        entry = self._data.get(profile_id)
+        if entry is not None:
+            return entry[1] if entry[0] > time.time() else None
+        if self._db is None:
+            return None
+        try:
+            _, head = self._fetch(profile_id, "head", time.time())
+        except KeyError:
+            return None
+        return _unpack_head(head)
+
+    async def aget_head(self, profile_id: str) -> ProfileResult | None:
+        """
+        Like ``get_head()``, but a spilled head is decoded in a worker thread.
+
+        Args:
+            profile_id: Profile to look up
+
+        Returns:
+            The profile (possibly with empty ``files``), or None if unknown
+        """
+        entry = self._data.get(profile_id)
+        if entry is not None:
+            return entry[1] if entry[0] > time.time() else None
+        try:
+            _, head = self._fetch(profile_id, "head", time.time())
+        except KeyError:
+            return None
+        return await asyncio.to_thread(_unpack_head, head)
+
+    def clear(self) -> None:
+        """Drop every profile, in memory and on disk."""
+        self._ids = None
+        self._data.clear()
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM profiles")
+
+    def expire(self) -> None:
+        """Drop every profile whose TTL has elapsed."""
+        now = time.time()
+        expired = [pid for pid, (expires, _) in self._data.items() if expires <= now]
+        for pid in expired:
+            del self._data[pid]
+        if expired:
+            self._ids = None
+        if self._db is not None:
+            with self._db:
+                cursor = self._db.execute(
+                    "DELETE FROM profiles WHERE expires <= ?", (now,)
+                )
+            if cursor.rowcount > 0:
+                self._ids = None
+
+    def _live_ids(self) -> tuple[str, ...]:
+        """Ids of unexpired profiles, reusing the last snapshot while valid."""
+        if self._ids is not None and time.time() < self._ids_expire:
+            return self._ids
+        self.expire()
+        if self._db is None:
+            ids = tuple(self._data)
+            soonest = min((e for e, _ in self._data.values()), default=None)
+        else:
+            rows = self._db.execute("SELECT profile_id FROM profiles ORDER BY rowid")
+            ids = tuple(profile_id for (profile_id,) in rows)
+            row = self._db.execute("SELECT MIN(expires) FROM profiles").fetchone()
+            soonest = row[0]
+        self._ids = ids
+        self._ids_expire = float("inf") if soonest is None else soonest
+        return ids
+
+    def _evict(self) -> None:
+        """Trim memory to ``maxsize``; spilled profiles stay on disk."""
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            if self._db is None:
+                self._ids = None
+
+    def _fetch(self, profile_id: str, column: str, now: float) -> tuple[float, bytes]:
+        """Read a spilled profile's expiry and ``column`` blob from disk."""
+        if self._db is None:
+            raise KeyError(profile_id)
+        row = self._db.execute(
+            f"SELECT expires, {column} FROM profiles"
+            " WHERE profile_id = ? AND expires > ?",
+            (profile_id, now),
+        ).fetchone()
+        if row is None:
+            raise KeyError(profile_id)
+        expires, blob = row
+        return expires, blob
+
+    def _insert(
+        self,
+        profile_id: str,
+        profile: ProfileResult,
+        row: tuple[bytes, bytes] | None,
+    ) -> None:
+        """Store a profile, writing its packed ``row`` through when spilling."""
+        expires = time.time() + self.ttl
+        self._ids = None
+        self._data[profile_id] = (expires, profile)
+        self._data.move_to_end(profile_id)
+        if self._db is not None and row is not None:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?)",
+                    (profile_id, expires, *row),
+                )
+        self.expire()
+        self._evict()
+
+    def _touch(
+        self, profile_id: str, entry: tuple[float, ProfileResult], now: float
+    ) -> ProfileResult:
+        """Mark an entry most recently used, dropping it if it has expired."""
+        expires, profile = entry
+        if expires <= now:
+            del self[profile_id]
+            raise KeyError(profile_id)
+        if profile_id not in self._data or next(reversed(self._data)) != profile_id:
+            self._ids = None
+        self._data[profile_id] = entry
+        self._data.move_to_end(profile_id)
+        self._evict()
+        return profile
@@ -1,3 +1,26 @@
 """Configuration management."""
 
-# Placeholder
+from __future__ import annotations
+
+from pathlib import Path
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Server settings, read from ``SCALENE_MCP_*`` environment variables."""
+
+    model_config = SettingsConfigDict(env_prefix="SCALENE_MCP_")
+
+    # Validate Scalene output against model bounds instead of trusting it
+    paranoid: bool = False
+
+    # Bounds on the in-memory store of recent profiles
+    cache_max: int = Field(default=64, ge=1)
+    cache_ttl: float = Field(default=3600.0, gt=0)
+    # Optional SQLite file backing recent profiles (kept in memory only if unset)
+    cache_spill_path: Path | None = None
+
+
+settings = Settings()
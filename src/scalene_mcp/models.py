@@ -6,9 +6,10 @@ and our own analysis results.
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 # ============================================================================
 # Raw Scalene Data Models (mirror Scalene's JSON schema)
@@ -237,6 +238,18 @@ class ProfileResult(BaseModel):
     scalene_args: dict[str, Any] = Field(default_factory=dict)
     raw_json_path: str | None = None
 
+    # Recent dumped tool responses for this profile, keyed by query, least
+    # recently used first; dropped with it
+    _dump_cache: OrderedDict[tuple[Any, ...], Any] = PrivateAttr(
+        default_factory=OrderedDict
+    )
+    # Metrics the run collected ("cpu", "memory", "gpu" -> bool); empty if unknown
+    _captured: dict[str, bool] = PrivateAttr(default_factory=dict)
+    # Lines sorted by metric ("cpu", "memory", "gpu") as (value, filename, line)
+    _rankings: dict[str, list[tuple[float, str, LineMetrics]]] = PrivateAttr(
+        default_factory=dict
+    )
+
 
 # ============================================================================
 # MCP Tool Response Models
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-import json
 import time
 from pathlib import Path
 from typing import Any
 
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+
+from scalene_mcp.config import settings
 from scalene_mcp.models import (
     FileMetrics,
     FunctionMetrics,
@@ -16,6 +19,14 @@ from scalene_mcp.models import (
     ProfileSummary,
 )
 
+# Scalene's JSON is a trusted internal source, so line-level records are built
+# with ``model_construct`` to skip per-field validation and bounds checks.
+# SCALENE_MCP_PARANOID=1 (or tests) turn this off to validate every row.
+_TRUSTED = not settings.paranoid
+
+# Validates a whole file's lines in one call when _TRUSTED is off
+_LINES_ADAPTER = TypeAdapter(list[LineMetrics])
+
 
 class ProfileParser:
     """Parse Scalene JSON output into our Pydantic models."""
@@ -35,26 +46,10 @@ class ProfileParser:
             Parsed ProfileResult with all metrics
 
         Raises:
-            json.JSONDecodeError: If the JSON is invalid
+            ValueError: If no valid JSON object found or the JSON is invalid
             KeyError: If required fields are missing
-            ValueError: If no valid JSON object found
         """
-        json_str = json_str.strip()
-        
-        # Scalene outputs JSON at the end. Extract it from mixed output.
-        # Find the last complete JSON object (starts with '{', ends with '}')
-        start_idx = json_str.find('{')
-        end_idx = json_str.rfind('}')
-        
-        if start_idx == -1 or end_idx == -1 or start_idx > end_idx:
-            raise ValueError("No valid JSON object found in output")
-        
-        json_content = json_str[start_idx:end_idx + 1]
-        
-        try:
-            data = json.loads(json_content)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON from output: {e}") from e
+        data = self._extract_json(json_str)
 
         # Generate profile ID if not provided
         if profile_id is None:
@@ -74,33 +69,72 @@ class ProfileParser:
 
         Raises:
             FileNotFoundError: If the JSON file doesn't exist
-            json.JSONDecodeError: If the JSON is invalid
+            ValueError: If the JSON is invalid
             KeyError: If required fields are missing
         """
         json_path = Path(json_path)
         if not json_path.exists():
             raise FileNotFoundError(f"Profile file not found: {json_path}")
 
-        with open(json_path) as f:
-            json_content = f.read()
+        raw = json_path.read_bytes()
+
+        # Scalene writes a pure JSON document to --outfile, so decode the bytes
+        # directly and only fall back to extraction for mixed output.
+        try:
+            data = from_json(raw)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = self._extract_json(raw.decode())
+        del raw
 
         # Generate profile ID from filename and timestamp
         profile_id = f"{json_path.stem}_{int(time.time())}"
 
-        # Use parse_json for consistent parsing, but pass the ID
-        result = self.parse_json(json_content, profile_id=profile_id)
+        result = self._parse_data(profile_id, data)
         
         # Update with file path info
         result.raw_json_path = str(json_path)
         
         return result
 
+    def _extract_json(self, json_str: str) -> dict[str, Any]:
+        """Extract and decode the last JSON object from possibly mixed output."""
+        json_str = json_str.strip()
+
+        # Scalene outputs JSON at the end. Extract it from mixed output.
+        # Find the last complete JSON object (starts with '{', ends with '}')
+        start_idx = json_str.find('{')
+        end_idx = json_str.rfind('}')
+
+        if start_idx == -1 or end_idx == -1 or start_idx > end_idx:
+            raise ValueError("No valid JSON object found in output")
+
+        json_content = json_str[start_idx:end_idx + 1]
+
+        try:
+            data: dict[str, Any] = from_json(json_content)
+        except ValueError as e:
+            raise ValueError(f"Failed to parse JSON from output: {e}") from e
+
+        return data
+
     def _parse_data(self, profile_id: str, data: dict[str, Any]) -> ProfileResult:
-        """Common parsing logic for both JSON string and file."""
-        # Parse files
+        """Common parsing logic for both JSON string and file.
+
+        Consumes ``data["files"]``: each file's raw record is dropped once its
+        models are built, so the decoded document and the parsed profile are
+        never both held in full.
+        """
+        # Parse files. Source text repeats across lines and files (blank lines,
+        # returns, closing brackets), so one copy of each string is shared for
+        # this profile and freed with it.
         files: dict[str, FileMetrics] = {}
-        for filename, file_data in data.get("files", {}).items():
-            files[filename] = self._parse_file_metrics(filename, file_data)
+        texts: dict[str, str] = {}
+        raw_files = data.get("files", {})
+        for filename in list(raw_files):
+            file_data = raw_files.pop(filename)
+            files[filename] = self._parse_file_metrics(filename, file_data, texts)
 
         # Create summary
         summary = self._create_summary(profile_id, data, files)
@@ -122,13 +156,14 @@ class ProfileParser:
         )
 
     def _parse_file_metrics(
-        self, filename: str, file_data: dict[str, Any]
+        self,
+        filename: str,
+        file_data: dict[str, Any],
+        texts: dict[str, str] | None = None,
     ) -> FileMetrics:
         """Parse metrics for a single file."""
         # Parse lines
-        lines: list[LineMetrics] = []
-        for line_data in file_data.get("lines", []):
-            lines.append(self._parse_line_metrics(line_data))
+        lines = self._parse_lines(file_data.get("lines", []), texts)
 
         # Parse functions
         functions: list[FunctionMetrics] = []
@@ -147,8 +182,9 @@ class ProfileParser:
                     line_text = line_data.get("line", "")
                     break
 
+            leak_cls = MemoryLeak.model_construct if _TRUSTED else MemoryLeak
             leaks.append(
-                MemoryLeak(
+                leak_cls(
                     filename=filename,
                     lineno=lineno,
                     line=line_text,
@@ -171,11 +207,28 @@ class ProfileParser:
             leaks=leaks,
         )
 
-    def _parse_line_metrics(self, line_data: dict[str, Any]) -> LineMetrics:
-        """Parse metrics for a single line."""
-        return LineMetrics(
+    def _parse_lines(
+        self, lines_data: list[dict[str, Any]], texts: dict[str, str] | None = None
+    ) -> list[LineMetrics]:
+        """Parse metrics for all lines of a file, sharing text through ``texts``."""
+        if texts is None:
+            texts = {}
+        rows = [self._line_fields(line_data, texts) for line_data in lines_data]
+        if _TRUSTED:
+            return [LineMetrics.model_construct(**row) for row in rows]
+        return _LINES_ADAPTER.validate_python(rows)
+
+    def _line_fields(
+        self, line_data: dict[str, Any], texts: dict[str, str]
+    ) -> dict[str, Any]:
+        """Map a Scalene line record onto LineMetrics field names."""
+        text = line_data.get("line", "")
+        return dict(
             lineno=line_data.get("lineno", 0),
-            line=line_data.get("line", ""),
+            # from_json only shares strings up to 64 bytes, and not on the
+            # fallback path. sys.intern is avoided: interned strings are
+            # immortal on 3.12+ and would outlive evicted profiles.
+            line=texts.setdefault(text, text),
             cpu_percent_python=line_data.get("n_cpu_percent_python", 0.0),
             cpu_percent_c=line_data.get("n_cpu_percent_c", 0.0),
             cpu_percent_system=line_data.get("n_sys_percent", 0.0),
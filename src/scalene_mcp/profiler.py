@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import os
+import sys
 import tempfile
 from pathlib import Path
 from typing import Any
@@ -13,6 +16,134 @@ from scalene_mcp.parser import ProfileParser
 
 logger = get_logger(__name__)
 
+# Scalene's stderr is drained while it runs and only the tail is kept for
+# error messages, so chatty scripts can't grow server memory without bound.
+_STDERR_CHUNK_SIZE = 64 * 1024
+_STDERR_TAIL_BYTES = 64 * 1024
+
+# Code snippets are written to memory-backed /dev/shm on Linux to avoid disk
+# I/O. Scalene's JSON output stays in the default temp dir, since /dev/shm is
+# often size-limited in containers.
+_SNIPPET_DIR = (
+    "/dev/shm"
+    if sys.platform.startswith("linux") and os.access("/dev/shm", os.W_OK)
+    else None
+)
+
+_BASE_COMMAND = (
+    "python",
+    "-m",
+    "scalene",
+    "run",  # Scalene v2+ requires 'run' subcommand
+    "--json",
+    "--no-browser",
+)
+
+# Boolean options as (option, flag, value that emits the flag)
+_SWITCHES: tuple[tuple[str, str, bool], ...] = (
+    ("cpu_only", "--cpu-only", True),
+    ("cpu", "--no-cpu", False),
+    ("memory", "--no-memory", False),
+    ("gpu", "--gpu", True),
+    ("stacks", "--stacks", True),
+    ("use_virtual_time", "--use-virtual-time", True),
+    ("memory_leak_detector", "--no-memory-leak-detector", False),
+    ("reduced_profile", "--reduced-profile", True),
+    ("profile_all", "--profile-all", True),
+)
+
+# Valued options as (option, flag, Scalene default); only non-defaults are passed
+_VALUE_OPTIONS: tuple[tuple[str, str, Any], ...] = (
+    ("cpu_sampling_rate", "--cpu-sampling-rate", 0.01),
+    ("cpu_percent_threshold", "--cpu-percent-threshold", 1.0),
+    ("malloc_threshold", "--malloc-threshold", 100),
+    ("allocation_sampling_window", "--allocation-sampling-window", 10485767),
+    ("profile_only", "--profile-only", ""),
+    ("profile_exclude", "--profile-exclude", ""),
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _normalize_path_list(paths: str) -> str:
+    """Canonicalize a comma-separated path filter for Scalene.
+
+    Scalene splits on bare commas and substring-matches each entry, so stray
+    spaces would never match and an empty entry would match every file.
+    """
+    return ",".join(p for p in (part.strip() for part in paths.split(",")) if p)
+
+
+def _build_command(
+    script_path: Path,
+    output_path: Path,
+    options: dict[str, Any],
+    script_args: list[str] | None = None,
+) -> list[str]:
+    """Build the Scalene argv for a script from profile_script's options."""
+    cmd = [
+        *_BASE_COMMAND,
+        "--outfile",
+        os.fspath(output_path),
+        *(flag for name, flag, when in _SWITCHES if options[name] == when),
+    ]
+    for name, flag, default in _VALUE_OPTIONS:
+        value = options[name]
+        if value != default:
+            cmd.extend([flag, str(value)])
+
+    # Add script path
+    cmd.append(os.fspath(script_path))
+
+    # Add script arguments
+    if script_args:
+        cmd.append("---")  # Scalene separator for script args
+        cmd.extend(script_args)
+
+    return cmd
+
+
+def _drop_minor_lines(
+    profile: ProfileResult, cpu_percent_threshold: float, malloc_threshold: int
+) -> None:
+    """Drop lines that only registered a little CPU time, as reduced output does.
+
+    Scalene's JSON only omits all-zero lines in reduced mode, so the stored
+    profile would otherwise still carry every barely-sampled line. Lines with
+    any memory or GPU activity, or that a leak report points at, are always
+    kept: ``malloc_threshold`` counts sampled allocations, so a single huge
+    allocation can fall below it. The summary is left as is, since it was
+    computed from the full run.
+    """
+    leaks = profile.summary.detected_leaks
+    for filename, file_metrics in profile.files.items():
+        leaked = {leak.lineno for leak in file_metrics.leaks}
+        leaked.update(leak.lineno for leak in leaks if leak.filename == filename)
+        kept = [
+            line
+            for line in file_metrics.lines
+            if line.total_cpu_percent >= cpu_percent_threshold
+            or line.memory_alloc_count >= malloc_threshold
+            or line.memory_peak_mb > 0
+            or line.memory_alloc_mb > 0
+            or line.gpu_percent > 0
+            or line.lineno in leaked
+        ]
+        if len(kept) < len(file_metrics.lines):
+            profile.files[filename] = file_metrics.model_copy(update={"lines": kept})
+
+
+async def _drain_stream(stream: asyncio.StreamReader, tail: bytearray) -> None:
+    """Read a stream to EOF, keeping only its last ``_STDERR_TAIL_BYTES`` in ``tail``.
+
+    Reads return whatever is available, often a single line, so the tail is
+    bounded by bytes rather than by number of reads. It is trimmed once it
+    doubles to avoid shifting the buffer on every read.
+    """
+    while chunk := await stream.read(_STDERR_CHUNK_SIZE):
+        tail += chunk
+        if len(tail) > 2 * _STDERR_TAIL_BYTES:
+            del tail[:-_STDERR_TAIL_BYTES]
+    del tail[:-_STDERR_TAIL_BYTES]
 
 
 class ScaleneProfiler:
@@ -93,83 +224,49 @@ class ScaleneProfiler:
         output_file.close()
 
         # Build Scalene command
-        cmd = [
-            "python",
-            "-m",
-            "scalene",
-            "run",  # Scalene v2+ requires 'run' subcommand
-            "--json",
-            "--outfile",
-            str(output_path),
-            "--no-browser",
-        ]
-
-        # Profiling modes
-        if cpu_only:
-            cmd.append("--cpu-only")
-        if not cpu:
-            cmd.append("--no-cpu")
-        if not memory:
-            cmd.append("--no-memory")
-        if gpu:
-            cmd.append("--gpu")
-
-        # Advanced options
-        if stacks:
-            cmd.append("--stacks")
-        if use_virtual_time:
-            cmd.append("--use-virtual-time")
-        if not memory_leak_detector:
-            cmd.append("--no-memory-leak-detector")
-        if reduced_profile:
-            cmd.append("--reduced-profile")
-
-        # Sampling and thresholds
-        if cpu_sampling_rate != 0.01:
-            cmd.extend(["--cpu-sampling-rate", str(cpu_sampling_rate)])
-        if cpu_percent_threshold != 1.0:
-            cmd.extend(["--cpu-percent-threshold", str(cpu_percent_threshold)])
-        if malloc_threshold != 100:
-            cmd.extend(["--malloc-threshold", str(malloc_threshold)])
-        if allocation_sampling_window != 10485767:
-            cmd.extend(
-                ["--allocation-sampling-window", str(allocation_sampling_window)]
-            )
-
-        # Scope control
-        if profile_all:
-            cmd.append("--profile-all")
-        if profile_only:
-            cmd.extend(["--profile-only", profile_only])
-        if profile_exclude:
-            cmd.extend(["--profile-exclude", profile_exclude])
-
-        # Add script path
-        cmd.append(str(script_path))
-
-        # Add script arguments
-        if script_args:
-            cmd.append("---")  # Scalene separator for script args
-            cmd.extend(script_args)
-
-        # Run profiler
+        options: dict[str, Any] = {
+            "cpu": cpu,
+            "memory": memory,
+            "gpu": gpu,
+            "cpu_only": cpu_only,
+            "stacks": stacks,
+            "use_virtual_time": use_virtual_time,
+            "cpu_sampling_rate": cpu_sampling_rate,
+            "cpu_percent_threshold": cpu_percent_threshold,
+            "malloc_threshold": malloc_threshold,
+            "allocation_sampling_window": allocation_sampling_window,
+            "profile_all": profile_all,
+            "profile_only": _normalize_path_list(profile_only),
+            "profile_exclude": _normalize_path_list(profile_exclude),
+            "memory_leak_detector": memory_leak_detector,
+            "reduced_profile": reduced_profile,
+        }
+        cmd = _build_command(script_path, output_path, options, script_args)
+
+        # Run profiler. The JSON goes to the output file, so the script's own
+        # stdout is discarded rather than buffered.
         logger.debug(f"Running Scalene command: {' '.join(cmd)}")
         process = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
         )
+        assert process.stderr is not None
+        stderr_tail = bytearray()
 
         try:
-            if timeout:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), timeout=timeout
-                )
-            else:
-                stdout, stderr = await process.communicate()
+            await asyncio.wait_for(
+                asyncio.gather(
+                    process.wait(), _drain_stream(process.stderr, stderr_tail)
+                ),
+                timeout=timeout or None,
+            )
 
             if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
+                stderr = bytes(stderr_tail)
+                error_msg = (
+                    stderr.decode(errors="replace") if stderr else "Unknown error"
+                )
                 logger.error(
                     f"Scalene profiling failed (exit code {process.returncode}): {error_msg}"
                 )
@@ -182,9 +279,14 @@ class ScaleneProfiler:
                 logger.error(f"Scalene did not create output file: {output_path}")
                 raise RuntimeError(f"Scalene did not create output file: {output_path}")
 
-            # Parse JSON from the temporary file
+            # Parse JSON from the temporary file off the event loop, so other
+            # MCP requests keep being served while large profiles are decoded
             parser = ProfileParser()
-            profile_result = parser.parse_file(output_path)
+            profile_result = await asyncio.to_thread(parser.parse_file, output_path)
+            if reduced_profile:
+                _drop_minor_lines(
+                    profile_result, cpu_percent_threshold, malloc_threshold
+                )
 
             return profile_result
 
@@ -231,6 +333,7 @@ class ScaleneProfiler:
             mode="w",
             suffix=".py",
             prefix="scalene_snippet_",
+            dir=_SNIPPET_DIR,
             delete=False,
         ) as f:
             f.write(code)
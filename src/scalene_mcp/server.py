@@ -3,15 +3,25 @@
 Main FastMCP server with tools, resources, and prompts for Scalene profiling.
 """
 
+import asyncio
+import fnmatch
+import functools
+import itertools
+import os
+import re
+from collections.abc import Awaitable, Callable, Iterator, Sequence
 from pathlib import Path
 from typing import Any
 
 from fastmcp import FastMCP
+from pydantic import BaseModel
 
 from scalene_mcp.logging import get_logger
 
 from .analyzer import ProfileAnalyzer
+from .cache import ProfileCache
 from .comparator import ProfileComparator
+from .config import settings
 from .models import ProfileResult
 from .parser import ProfileParser
 from .profiler import ScaleneProfiler
@@ -25,8 +35,24 @@ parser = ProfileParser()
 analyzer = ProfileAnalyzer()
 comparator = ProfileComparator()
 
-# Store recent profiles (in-memory for now)
-recent_profiles: dict[str, ProfileResult] = {}
+# Store recent profiles (bounded by count and age, optionally spilled to disk)
+recent_profiles = ProfileCache(
+    maxsize=settings.cache_max,
+    ttl=settings.cache_ttl,
+    spill_path=settings.cache_spill_path,
+)
+
+# Fallback ids; len(recent_profiles) would repeat once entries are evicted
+_profile_ids = itertools.count()
+
+# Cap on file names listed when a requested file is not in a profile
+_MAX_LISTED_FILES = 20
+
+# Cap on memoized analysis results kept per profile
+_MAX_MEMOIZED = 16
+
+# Profile runs in progress, keyed by their arguments
+_inflight: dict[tuple[Any, ...], asyncio.Future[ProfileResult]] = {}
 
 # Project context (auto-detected or explicitly set)
 _project_root: Path | None = None
@@ -34,6 +60,13 @@ _project_root: Path | None = None
 logger = get_logger(__name__)
 
 
+# Files or directories whose presence marks a project root, in the order
+# get_project_root reports them
+_PROJECT_MARKERS = (
+    "pyproject.toml", "setup.py", "package.json", ".git", "Makefile", "GNUmakefile"
+)
+
+
 def _detect_project_root(start_path: Path | None = None) -> Path:
     """Auto-detect project root by looking for common markers.
     
@@ -44,11 +77,9 @@ def _detect_project_root(start_path: Path | None = None) -> Path:
     if search_path.is_file():
         search_path = search_path.parent
     
-    markers = {".git", "pyproject.toml", "setup.py", "package.json", "Makefile", "GNUmakefile"}
-    
     # Search up directory tree
     for current in [search_path, *search_path.parents]:
-        if any((current / marker).exists() for marker in markers):
+        if any((current / marker).exists() for marker in _PROJECT_MARKERS):
             return current
     
     # Fallback to cwd
@@ -76,43 +107,116 @@ def _resolve_path(relative_or_absolute: str) -> Path:
 # ============================================================================
 
 
+@functools.lru_cache(maxsize=32)
+def _scan_project_markers(root: str, mtime_ns: int) -> tuple[str, tuple[str, ...]]:
+    """Detect project type and markers with one directory read.
+
+    Keyed on the directory's mtime, which changes whenever an entry is added
+    or removed, so a cached answer never outlives the markers it saw.
+    """
+    names = {entry.name for entry in os.scandir(root)}
+
+    project_type = "unknown"
+    if "pyproject.toml" in names or "setup.py" in names:
+        project_type = "python"
+    if "package.json" in names:
+        project_type = "node" if project_type == "unknown" else "mixed"
+
+    markers = tuple(marker for marker in _PROJECT_MARKERS if marker in names)
+    return project_type, markers
+
+
 async def get_project_root() -> dict[str, str]:
     """Get the detected project root and structure type.
     
     Returns: {root, type, markers_found}
     """
     root = _get_project_root()
-    
-    # Detect project type
-    project_type = "unknown"
-    markers_found = []
-    
-    if (root / "pyproject.toml").exists():
-        project_type = "python"
-        markers_found.append("pyproject.toml")
-    if (root / "setup.py").exists():
-        project_type = "python"
-        markers_found.append("setup.py")
-    if (root / "package.json").exists():
-        project_type = "node" if project_type == "unknown" else "mixed"
-        markers_found.append("package.json")
-    if (root / ".git").exists():
-        markers_found.append(".git")
-    if (root / "Makefile").exists():
-        markers_found.append("Makefile")
-    if (root / "GNUmakefile").exists():
-        markers_found.append("GNUmakefile")
+    project_type, markers_found = _scan_project_markers(
+        str(root), root.stat().st_mtime_ns
+    )
     
     return {
         "root": str(root.absolute()),
         "type": project_type,
-        "markers_found": ", ".join(markers_found) if markers_found else "none",
+        "markers_found": ", ".join(markers_found) or "none",
     }
 
 
 server.tool(get_project_root)
 
 
+def _walk_files(
+    directory: str, max_depth: int, exclude: frozenset[str]
+) -> Iterator[str]:
+    """Yield file paths up to ``max_depth`` levels below ``directory``.
+
+    Directories named in ``exclude`` are pruned before descending, so trees such
+    as virtualenvs are never listed. Symlinked directories are not followed.
+    """
+    if max_depth < 1:
+        return
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in exclude:
+                yield from _walk_files(entry.path, max_depth - 1, exclude)
+        elif entry.is_file():
+            yield entry.path
+
+
+_GLOB_MAGIC = re.compile(r"[*?[]")
+
+# Compiled glob segment; None stands for "**"
+_GlobSegment = re.Pattern[str] | None
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_glob(pattern: str) -> tuple[_GlobSegment, ...]:
+    """Compile each ``/``-separated segment of a glob pattern once.
+
+    Patterns without a ``**`` match at any depth, as if prefixed with ``**/``.
+    """
+    segments = pattern.split("/")
+    if "**" not in segments:
+        segments.insert(0, "**")
+    return tuple(
+        None if segment == "**" else re.compile(fnmatch.translate(segment))
+        for segment in segments
+    )
+
+
+def _glob_match(parts: Sequence[str], segments: Sequence[_GlobSegment]) -> bool:
+    """Match path parts against compiled glob segments."""
+    if not segments:
+        return not parts
+    head, rest = segments[0], segments[1:]
+    if head is None:
+        if not rest:
+            return bool(parts)
+        return any(_glob_match(parts[i:], rest) for i in range(len(parts)))
+    if not parts or head.match(parts[0]) is None:
+        return False
+    return _glob_match(parts[1:], rest)
+
+
+def _literal_prefix(pattern: str) -> list[str]:
+    """Leading wildcard-free directories of a root-anchored ``**`` pattern.
+
+    ``src/**/*.py`` can only match below ``src``, so the walk starts there.
+    Patterns without ``**`` match at any depth and have no usable prefix.
+    """
+    segments = pattern.split("/")
+    if "**" not in segments:
+        return []
+    return list(
+        itertools.takewhile(lambda s: not _GLOB_MAGIC.search(s), segments[:-1])
+    )
+
+
 async def list_project_files(
     pattern: str = "*.py",
     max_depth: int = 3,
@@ -128,33 +232,30 @@ async def list_project_files(
     Returns: [relative_path, ...] sorted alphabetically
     """
     root = _get_project_root()
-    exclude = {s.strip() for s in exclude_patterns.split(",") if s.strip()}
-    
-    def should_exclude(p: Path) -> bool:
-        """Check if path should be excluded."""
-        return any(part in exclude for part in p.parts)
-    
+    exclude = frozenset(filter(None, (s.strip() for s in exclude_patterns.split(","))))
+    segments = _compile_glob(pattern)
+    # A bare file-name pattern ("*.py") only needs the last path component
+    name_re = segments[-1] if segments[:-1] == (None,) else None
+    
+    root_str = str(root)
+    prefix_len = len(os.path.join(root_str, ""))
+    literal = _literal_prefix(pattern)
+    if exclude.intersection(literal):
+        return []
+    scan_dir = os.path.join(root_str, *literal)
+    depth = max_depth - len(literal)
     results = []
+    for file_path in _walk_files(scan_dir, depth, exclude):
+        rel_path = file_path[prefix_len:]
+        if name_re is not None:
+            matched = name_re.match(rel_path.rpartition(os.sep)[2]) is not None
+        else:
+            matched = _glob_match(rel_path.split(os.sep), segments)
+        if matched:
+            results.append(rel_path)
     
-    # Handle different pattern types
-    if "**" in pattern:
-        # Recursive glob
-        glob_pattern = pattern
-    else:
-        # Non-recursive, search at all depths
-        glob_pattern = f"**/{pattern}"
-    
-    for file_path in sorted(root.glob(glob_pattern)):
-        if file_path.is_file() and not should_exclude(file_path):
-            try:
-                rel_path = file_path.relative_to(root)
-                depth = len(rel_path.parts)
-                if depth <= max_depth:
-                    results.append(str(rel_path))
-            except ValueError:
-                pass
-    
-    return sorted(results)
+    results.sort()
+    return results
 
 
 server.tool(list_project_files)
@@ -192,6 +293,23 @@ server.tool(set_project_context)
 # ============================================================================
 
 
+async def _run_once(
+    key: tuple[Any, ...], run: Callable[[], Awaitable[ProfileResult]]
+) -> ProfileResult:
+    """Await ``run()``, or join an identical profile run already in progress.
+
+    The run is shielded so one caller giving up does not cancel it for the
+    others waiting on the same result, and it stays joinable until it
+    finishes, whoever started it.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
 async def profile(
     type: str,
     script_path: str | None = None,
@@ -206,6 +324,7 @@ async def profile(
     cpu_percent_threshold: float = 1.0,
     malloc_threshold: int = 100,
     script_args: list[str] | None = None,
+    include_text_summary: bool = True,
 ) -> dict[str, Any]:
     """Profile Python code using Scalene.
     
@@ -223,6 +342,8 @@ async def profile(
         cpu_percent_threshold: Minimum CPU % to report
         malloc_threshold: Minimum allocation bytes to report
         script_args: Command-line arguments for the script
+        include_text_summary: Build the Markdown text_summary (empty string if
+            False; fetch it later with analyze(metric_type="summary"))
         
     Returns: {profile_id, summary, text_summary}
     """
@@ -233,45 +354,145 @@ async def profile(
         if not path.exists():
             raise FileNotFoundError(f"Script not found: {path}")
         
-        profile = await profiler.profile_script(
-            path,
-            cpu_only=cpu_only,
-            memory=include_memory and not cpu_only,
-            gpu=include_gpu,
-            reduced_profile=reduced_profile,
-            profile_only=profile_only,
-            profile_exclude=profile_exclude,
-            use_virtual_time=use_virtual_time,
-            cpu_percent_threshold=cpu_percent_threshold,
-            malloc_threshold=malloc_threshold,
-            script_args=script_args or [],
+        run_key = (
+            "script",
+            str(path.resolve()),
+            cpu_only,
+            include_memory,
+            include_gpu,
+            reduced_profile,
+            profile_only,
+            profile_exclude,
+            use_virtual_time,
+            cpu_percent_threshold,
+            malloc_threshold,
+            tuple(script_args or ()),
+        )
+        profile = await _run_once(
+            run_key,
+            lambda: profiler.profile_script(
+                path,
+                cpu_only=cpu_only,
+                memory=include_memory and not cpu_only,
+                gpu=include_gpu,
+                reduced_profile=reduced_profile,
+                profile_only=profile_only,
+                profile_exclude=profile_exclude,
+                use_virtual_time=use_virtual_time,
+                cpu_percent_threshold=cpu_percent_threshold,
+                malloc_threshold=malloc_threshold,
+                script_args=script_args or [],
+            ),
         )
     elif type == "code":
         if not code:
             raise ValueError("code required when type='code'")
-        profile = await profiler.profile_code(
-            code,
-            cpu_only=cpu_only,
-            memory=include_memory and not cpu_only,
-            reduced_profile=reduced_profile,
+        profile = await _run_once(
+            ("code", code, cpu_only, include_memory, reduced_profile),
+            lambda: profiler.profile_code(
+                code,
+                cpu_only=cpu_only,
+                memory=include_memory and not cpu_only,
+                reduced_profile=reduced_profile,
+            ),
         )
     else:
         raise ValueError(f"type must be 'script' or 'code', got: {type}")
 
+    # Record what the run collected so analysis can skip absent metrics
+    profile._captured = {
+        "cpu": True,
+        "memory": include_memory and not cpu_only,
+        "gpu": include_gpu and type == "script",
+    }
+
+    # Rank lines once so every later hotspot query is just a slice
+    await asyncio.to_thread(analyzer.rank_lines, profile)
+
     # Store profile
-    profile_id = profile.profile_id or f"profile_{len(recent_profiles)}"
-    recent_profiles[profile_id] = profile
+    profile_id = profile.profile_id or f"profile_{next(_profile_ids)}"
+    await recent_profiles.aset(profile_id, profile)
+
+    text_summary = ""
+    if include_text_summary:
+        text_summary = await _memoized(
+            profile, ("summary",), lambda: analyzer.generate_summary(profile)
+        )
 
     return {
         "profile_id": profile_id,
         "summary": profile.summary.model_dump(),
-        "text_summary": analyzer.generate_summary(profile),
+        "text_summary": text_summary,
     }
 
 
 server.tool(profile)
 
 
+def _fast_dump(model: BaseModel) -> dict[str, Any]:
+    """Dump a flat model (no nested models) by copying its field values.
+
+    Same result as ``model_dump()`` for Hotspot and MemoryLeak, several times
+    cheaper since it skips the serializer.
+    """
+    return dict(model.__dict__)
+
+
+async def _memoized(
+    profile: ProfileResult, key: tuple[Any, ...], compute: Callable[[], Any]
+) -> Any:
+    """Run ``compute`` in a worker thread once per profile and query key.
+
+    Only the most recent ``_MAX_MEMOIZED`` results are kept per profile, so
+    clients sweeping parameters can't grow a cached profile without bound.
+    """
+    cache = profile._dump_cache
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    result = await asyncio.to_thread(compute)
+    cache[key] = result
+    while len(cache) > _MAX_MEMOIZED:
+        cache.popitem(last=False)
+    return result
+
+
+# Hotspot rankings served by analyze(), keyed by metric_type
+_HOTSPOT_GETTERS: dict[str, Callable[..., list[Any]]] = {
+    "cpu": analyzer.get_top_cpu_hotspots,
+    "memory": analyzer.get_top_memory_hotspots,
+    "gpu": analyzer.get_top_gpu_hotspots,
+}
+
+
+async def _hotspots(
+    profile: ProfileResult, metric: str, top_n: int
+) -> list[dict[str, Any]]:
+    """Dumped top ``top_n`` hotspots for ``metric``, memoized per profile."""
+    getter = _HOTSPOT_GETTERS[metric]
+    result: list[dict[str, Any]] = await _memoized(
+        profile,
+        (metric, top_n),
+        lambda: [_fast_dump(h) for h in getter(profile, n=top_n)],
+    )
+    return result
+
+
+async def _bottlenecks(
+    profile: ProfileResult, cpu_threshold: float, memory_threshold_mb: float
+) -> dict[str, list[dict[str, Any]]]:
+    """Lines exceeding the thresholds, memoized per profile."""
+    result: dict[str, list[dict[str, Any]]] = await _memoized(
+        profile,
+        ("bottlenecks", cpu_threshold, memory_threshold_mb),
+        lambda: analyzer.identify_bottlenecks(
+            profile,
+            cpu_threshold=cpu_threshold,
+            memory_threshold_mb=memory_threshold_mb,
+        ),
+    )
+    return result
+
 
 # ============================================================================
 # Analysis Tool (Mega Tool)
@@ -290,7 +511,7 @@ async def analyze(
     
     Args:
         profile_id: Profile ID from profile()
-        metric_type: "all", "cpu", "memory", "gpu", "bottlenecks", "leaks", "file", "functions", "recommendations"
+        metric_type: "all", "cpu", "memory", "gpu", "bottlenecks", "leaks", "file", "functions", "recommendations", "report", "summary"
         top_n: Number of items to return (for rankings)
         cpu_threshold: Minimum CPU % to flag bottleneck
         memory_threshold_mb: Minimum MB to flag bottleneck
@@ -298,64 +519,56 @@ async def analyze(
         
     Returns: {metric_type, data, summary} structure varies by metric_type
     """
-    if profile_id not in recent_profiles:
+    # Leaks live in the summary, so a spilled profile need not be fully loaded
+    if metric_type == "leaks":
+        profile = await recent_profiles.aget_head(profile_id)
+    else:
+        profile = await recent_profiles.aget(profile_id)
+    if profile is None:
         raise ValueError(f"Profile not found: {profile_id}")
 
-    profile = recent_profiles[profile_id]
-    
+    # Analyzer calls are synchronous and walk every line of the profile, so
+    # they run in a worker thread to keep the event loop free for other tools.
+    # Results are memoized on the profile, so repeat queries skip the work.
     if metric_type == "all":
         # Comprehensive analysis
-        analysis = analyzer.analyze(
+        analysis = await _memoized(
             profile,
-            top_n=top_n,
-            cpu_threshold=cpu_threshold,
-            memory_threshold_mb=memory_threshold_mb,
-            focus="all",
+            ("all", top_n, cpu_threshold, memory_threshold_mb),
+            lambda: analyzer.analyze(
+                profile,
+                top_n=top_n,
+                cpu_threshold=cpu_threshold,
+                memory_threshold_mb=memory_threshold_mb,
+                focus="all",
+            ).model_dump(),
         )
         return {
             "metric_type": "all",
-            "data": analysis.model_dump(),
-        }
-    
-    elif metric_type == "cpu":
-        # CPU hotspots
-        hotspots = analyzer.get_top_cpu_hotspots(profile, n=top_n)
-        return {
-            "metric_type": "cpu",
-            "data": [h.model_dump() for h in hotspots],
-        }
-    
-    elif metric_type == "memory":
-        # Memory hotspots
-        hotspots = analyzer.get_top_memory_hotspots(profile, n=top_n)
-        return {
-            "metric_type": "memory",
-            "data": [h.model_dump() for h in hotspots],
+            "data": analysis,
         }
     
-    elif metric_type == "gpu":
-        # GPU hotspots
-        hotspots = analyzer.get_top_gpu_hotspots(profile, n=top_n)
+    elif metric_type in _HOTSPOT_GETTERS:
+        # CPU, memory or GPU hotspots
         return {
-            "metric_type": "gpu",
-            "data": [h.model_dump() for h in hotspots],
+            "metric_type": metric_type,
+            "data": await _hotspots(profile, metric_type, top_n),
         }
     
     elif metric_type == "bottlenecks":
         # Lines exceeding thresholds
-        bottlenecks = analyzer.identify_bottlenecks(
-            profile,
-            cpu_threshold=cpu_threshold,
-            memory_threshold_mb=memory_threshold_mb,
-        )
         return {
             "metric_type": "bottlenecks",
-            "data": bottlenecks,
+            "data": await _bottlenecks(profile, cpu_threshold, memory_threshold_mb),
         }
     
     elif metric_type == "leaks":
         # Memory leaks
-        leaks = [leak.model_dump() for leak in profile.summary.detected_leaks]
+        leaks = await _memoized(
+            profile,
+            ("leaks",),
+            lambda: [_fast_dump(leak) for leak in profile.summary.detected_leaks],
+        )
         return {
             "metric_type": "leaks",
             "data": leaks,
@@ -366,20 +579,29 @@ async def analyze(
         if not filename:
             raise ValueError("filename required when metric_type='file'")
         if filename not in profile.files:
-            available = list(profile.files.keys())
+            names = list(itertools.islice(profile.files, _MAX_LISTED_FILES))
+            more = len(profile.files) - len(names)
+            available = ", ".join(names) + (f", ... (+{more} more)" if more else "")
             raise ValueError(
-                f"File not in profile: {filename}. Available: {', '.join(available)}"
+                f"File not in profile: {filename}. "
+                f"Available ({len(profile.files)}): {available}"
             )
+        # A plain dump of every line with its samples; not memoized, since
+        # keeping it would store the file's data a second time
         file_metrics = profile.files[filename]
         return {
             "metric_type": "file",
             "filename": filename,
-            "data": file_metrics.model_dump(),
+            "data": await asyncio.to_thread(file_metrics.model_dump),
         }
     
     elif metric_type == "functions":
         # Function-level metrics
-        functions = analyzer.get_function_summary(profile, top_n=top_n)
+        functions = await _memoized(
+            profile,
+            ("functions", top_n),
+            lambda: analyzer.get_function_summary(profile, top_n=top_n),
+        )
         return {
             "metric_type": "functions",
             "data": functions,
@@ -387,16 +609,46 @@ async def analyze(
     
     elif metric_type == "recommendations":
         # Optimization recommendations
-        recommendations = analyzer.generate_recommendations(profile)
+        recommendations = await _memoized(
+            profile,
+            ("recommendations",),
+            lambda: analyzer.generate_recommendations(profile),
+        )
         return {
             "metric_type": "recommendations",
             "data": recommendations,
         }
     
+    elif metric_type == "report":
+        # CPU/memory/GPU hotspots and bottlenecks in one round-trip; each part
+        # shares the memoized result of its own metric_type
+        report: dict[str, Any] = {
+            metric: await _hotspots(profile, metric, top_n)
+            for metric in _HOTSPOT_GETTERS
+        }
+        report["bottlenecks"] = await _bottlenecks(
+            profile, cpu_threshold, memory_threshold_mb
+        )
+        return {
+            "metric_type": "report",
+            "data": report,
+        }
+    
+    elif metric_type == "summary":
+        # Markdown text summary, as profile() returns by default
+        text_summary = await _memoized(
+            profile, ("summary",), lambda: analyzer.generate_summary(profile)
+        )
+        return {
+            "metric_type": "summary",
+            "data": text_summary,
+        }
+    
     else:
         raise ValueError(
             f"Unknown metric_type: {metric_type}. "
-            "Must be: all, cpu, memory, gpu, bottlenecks, leaks, file, functions, recommendations"
+            "Must be: all, cpu, memory, gpu, bottlenecks, leaks, file, functions, "
+            "recommendations, report, summary"
         )
 
 
@@ -415,15 +667,14 @@ async def compare_profiles(
         
     Returns: {runtime_change_pct, memory_change_pct, improvements, regressions, summary_text}
     """
-    if before_id not in recent_profiles:
+    before = await recent_profiles.aget_head(before_id)
+    if before is None:
         raise ValueError(f"Profile not found: {before_id}")
-    if after_id not in recent_profiles:
+    after = await recent_profiles.aget_head(after_id)
+    if after is None:
         raise ValueError(f"Profile not found: {after_id}")
 
-    before = recent_profiles[before_id]
-    after = recent_profiles[after_id]
-
-    comparison = comparator.compare(before, after)
+    comparison = await asyncio.to_thread(comparator.compare, before, after)
     return comparison.model_dump()
 
 
@@ -460,6 +711,7 @@ async def profile_script(
     cpu_percent_threshold: float = 1.0,
     malloc_threshold: int = 100,
     script_args: list[str] | None = None,
+    include_text_summary: bool = True,
     **kwargs: dict[str, Any],
 ) -> dict[str, Any]:
     """DEPRECATED: Use profile(type='script', ...) instead.
@@ -479,6 +731,7 @@ async def profile_script(
         cpu_percent_threshold=cpu_percent_threshold,
         malloc_threshold=malloc_threshold,
         script_args=script_args,
+        include_text_summary=include_text_summary,
     )
 
 
@@ -488,6 +741,7 @@ async def profile_code(
     include_memory: bool = True,
     include_gpu: bool = False,
     reduced_profile: bool = False,
+    include_text_summary: bool = True,
     **kwargs: dict[str, Any],
 ) -> dict[str, Any]:
     """DEPRECATED: Use profile(type='code', ...) instead.
@@ -501,6 +755,7 @@ async def profile_code(
         include_memory=include_memory,
         include_gpu=include_gpu,
         reduced_profile=reduced_profile,
+        include_text_summary=include_text_summary,
     )
 
 
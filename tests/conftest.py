@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
 import pytest
 from fastmcp import FastMCP
+from pydantic_core import from_json
 
 # Import the actual MCP server instance
 from scalene_mcp import server as mcp_server
@@ -14,21 +14,23 @@ from scalene_mcp import server as mcp_server
 # ============================================================================
 # Directory Fixtures
 # ============================================================================
+# Fixtures below only hand out paths and read-only data, so they are built
+# once per session.
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def fixtures_dir() -> Path:
     """Path to test fixtures directory."""
     return Path(__file__).parent / "fixtures"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def profiles_dir(fixtures_dir: Path) -> Path:
     """Path to sample profile outputs."""
     return fixtures_dir / "profiles"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def scripts_dir(fixtures_dir: Path) -> Path:
     """Path to sample scripts."""
     return fixtures_dir / "scripts"
@@ -39,7 +41,7 @@ def scripts_dir(fixtures_dir: Path) -> Path:
 # ============================================================================
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def server() -> FastMCP:
     """FastMCP server instance for testing."""
     return mcp_server
@@ -50,40 +52,37 @@ def server() -> FastMCP:
 # ============================================================================
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_profile_simple(profiles_dir: Path) -> dict:
     """Simple CPU profile data."""
-    with open(profiles_dir / "simple_cpu.json") as f:
-        return json.load(f)
+    return from_json((profiles_dir / "simple_cpu.json").read_bytes())
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_profile_leak(profiles_dir: Path) -> dict:
     """Profile with memory leaks."""
-    with open(profiles_dir / "memory_leak.json") as f:
-        return json.load(f)
+    return from_json((profiles_dir / "memory_leak.json").read_bytes())
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_profile_memory_heavy(profiles_dir: Path) -> dict:
     """Memory-intensive profile data."""
-    with open(profiles_dir / "memory_heavy.json") as f:
-        return json.load(f)
+    return from_json((profiles_dir / "memory_heavy.json").read_bytes())
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def fibonacci_script(scripts_dir: Path) -> Path:
     """Path to fibonacci test script."""
     return scripts_dir / "fibonacci.py"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def memory_heavy_script(scripts_dir: Path) -> Path:
     """Path to memory-intensive test script."""
     return scripts_dir / "memory_heavy.py"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def leaky_script(scripts_dir: Path) -> Path:
     """Path to script with memory leaks."""
     return scripts_dir / "leaky.py"
@@ -94,19 +93,19 @@ def leaky_script(scripts_dir: Path) -> Path:
 # ============================================================================
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def simple_cpu_profile_json(profiles_dir: Path) -> Path:
     """Path to simple CPU profile JSON file."""
     return profiles_dir / "simple_cpu.json"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def memory_leak_profile_json(profiles_dir: Path) -> Path:
     """Path to memory leak profile JSON file."""
     return profiles_dir / "memory_leak.json"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def memory_heavy_profile_json(profiles_dir: Path) -> Path:
     """Path to memory-heavy profile JSON file."""
     return profiles_dir / "memory_heavy.json"
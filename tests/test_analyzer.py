@@ -1,5 +1,7 @@
 """Tests for ProfileAnalyzer."""
 
+from unittest.mock import patch
+
 import pytest
 
 from scalene_mcp.analyzer import ProfileAnalyzer
@@ -61,6 +63,40 @@ class TestTopCpuHotspots:
         if len(hotspots_10) > 3:
             assert len(hotspots_3) == 3
 
+    def test_get_top_cpu_hotspots_matches_full_sort(
+        self, analyzer, parser, simple_cpu_profile_json
+    ):
+        """Test top-N selection returns the same lines as a full sort."""
+        profile = parser.parse_file(simple_cpu_profile_json)
+        expected = sorted(
+            (
+                (line.total_cpu_percent, filename, line.lineno)
+                for filename, fm in profile.files.items()
+                for line in fm.lines
+                if line.total_cpu_percent > 0
+            ),
+            key=lambda x: x[0],
+            reverse=True,
+        )[:3]
+
+        hotspots = analyzer.get_top_cpu_hotspots(profile, n=3)
+
+        assert [(h.cpu_percent, h.filename, h.lineno) for h in hotspots] == expected
+
+    def test_rank_lines_reused_across_queries(
+        self, analyzer, parser, simple_cpu_profile_json
+    ):
+        """Test hotspot queries slice precomputed rankings instead of rescanning."""
+        profile = parser.parse_file(simple_cpu_profile_json)
+        analyzer.rank_lines(profile)
+        expected = analyzer.get_top_cpu_hotspots(profile, n=5)
+
+        with patch.object(analyzer, "_iter_lines", side_effect=AssertionError):
+            assert analyzer.get_top_cpu_hotspots(profile, n=5) == expected
+            assert analyzer.get_top_cpu_hotspots(profile, n=2) == expected[:2]
+            analyzer.get_top_memory_hotspots(profile)
+            analyzer.get_top_gpu_hotspots(profile)
+
 
 class TestTopMemoryHotspots:
     """Test memory hotspot extraction."""
@@ -82,6 +118,20 @@ class TestTopMemoryHotspots:
         for i in range(len(hotspots) - 1):
             assert hotspots[i].memory_mb >= hotspots[i + 1].memory_mb
 
+    def test_memory_not_captured_skips_scan(
+        self, analyzer, parser, memory_heavy_profile_json
+    ):
+        """Test a CPU-only capture returns no memory hotspots without scanning."""
+        profile = parser.parse_file(memory_heavy_profile_json)
+        profile._captured = {"cpu": True, "memory": False, "gpu": False}
+
+        with patch.object(analyzer, "_iter_lines", side_effect=AssertionError):
+            assert analyzer.get_top_memory_hotspots(profile) == []
+            assert analyzer.get_top_gpu_hotspots(profile) == []
+
+        bottlenecks = analyzer.identify_bottlenecks(profile, memory_threshold_mb=0.0)
+        assert bottlenecks["memory"] == []
+
     def test_get_top_memory_hotspots_details(
         self, analyzer, parser, memory_heavy_profile_json
     ):
@@ -0,0 +1,223 @@
+"""Tests for the bounded profile cache."""
+
+import os
+import stat
+import threading
+import zlib
+from unittest import mock
+
+import pytest
+from pydantic import ValidationError
+
+from scalene_mcp import cache as cache_module
+from scalene_mcp.cache import ProfileCache
+from scalene_mcp.config import Settings
+from scalene_mcp.models import (
+    FileMetrics,
+    LineMetrics,
+    MemoryLeak,
+    ProfileResult,
+    ProfileSummary,
+)
+
+
+def make_profile(profile_id: str) -> ProfileResult:
+    """Create a minimal profile for cache tests."""
+    return ProfileResult(
+        profile_id=profile_id,
+        timestamp=1000.0,
+        summary=ProfileSummary(
+            profile_id=profile_id,
+            timestamp=1000.0,
+            elapsed_time_sec=1.0,
+            max_memory_mb=0.0,
+            total_allocations_mb=0.0,
+            allocation_count=0,
+            total_cpu_samples=0,
+            python_time_percent=0.0,
+            native_time_percent=0.0,
+            system_time_percent=0.0,
+            files_profiled=[],
+            lines_profiled=0,
+        ),
+        files={},
+        scalene_version="1.0.0",
+    )
+
+
+class TestProfileCache:
+    """Tests for ProfileCache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that inserting past maxsize drops the least recently used."""
+        cache = ProfileCache(maxsize=2)
+        cache["a"] = make_profile("a")
+        cache["b"] = make_profile("b")
+        assert cache["a"].profile_id == "a"  # touch "a" so "b" is oldest
+
+        cache["c"] = make_profile("c")
+
+        assert list(cache) == ["a", "c"]
+        assert "b" not in cache
+
+    @pytest.mark.parametrize("name", ["CACHE_MAX", "CACHE_TTL"])
+    @pytest.mark.parametrize("value", ["0", "-1"])
+    def test_settings_reject_non_positive_bounds(self, monkeypatch, name, value):
+        """Test that zero or negative cache bounds are rejected."""
+        monkeypatch.setenv(f"SCALENE_MCP_{name}", value)
+        with pytest.raises(ValidationError):
+            Settings()
+
+    def test_expires_after_ttl(self):
+        """Test that entries disappear once their TTL elapses."""
+        cache = ProfileCache(ttl=10.0)
+        with mock.patch("scalene_mcp.cache.time.time", return_value=100.0):
+            cache["a"] = make_profile("a")
+
+        with mock.patch("scalene_mcp.cache.time.time", return_value=105.0):
+            assert "a" in cache
+        with mock.patch("scalene_mcp.cache.time.time", return_value=110.0):
+            assert "a" not in cache
+            with pytest.raises(KeyError):
+                cache["a"]
+            assert len(cache) == 0
+
+    def test_ids_snapshot_reused_until_change(self):
+        """Test listing ids reuses a snapshot until the cache changes."""
+        cache = ProfileCache(ttl=10.0)
+        with mock.patch("scalene_mcp.cache.time.time", return_value=100.0):
+            cache["a"] = make_profile("a")
+            ids = cache._live_ids()
+            assert cache._live_ids() is ids
+
+            cache["b"] = make_profile("b")
+            assert list(cache) == ["a", "b"]
+
+        with mock.patch("scalene_mcp.cache.time.time", return_value=110.0):
+            assert list(cache) == []
+
+    def test_spill_reloads_evicted_profiles(self, tmp_path):
+        """Test that profiles pushed out of memory are read back from disk."""
+        spill = tmp_path / "profiles.db"
+        cache = ProfileCache(maxsize=1, spill_path=spill)
+        cache["a"] = make_profile("a")
+        cache["b"] = make_profile("b")
+
+        assert list(cache._data) == ["b"]
+        assert "a" in cache
+        assert cache["a"].profile_id == "a"
+        assert list(cache) == ["a", "b"]
+
+        # A fresh cache on the same file sees earlier profiles
+        restarted = ProfileCache(maxsize=1, spill_path=spill)
+        assert restarted["b"].profile_id == "b"
+
+        del restarted["a"]
+        assert "a" not in restarted
+        with pytest.raises(KeyError):
+            del restarted["a"]
+
+    def test_spill_file_is_user_only(self, tmp_path):
+        """Test that the spill file is private even under a permissive umask."""
+        fresh = tmp_path / "fresh.db"
+        existing = tmp_path / "existing.db"
+        existing.touch(mode=0o644)
+        old_umask = os.umask(0)
+        try:
+            ProfileCache(spill_path=fresh)["a"] = make_profile("a")
+            ProfileCache(spill_path=existing)
+        finally:
+            os.umask(old_umask)
+
+        assert stat.S_IMODE(fresh.stat().st_mode) == 0o600
+        assert stat.S_IMODE(existing.stat().st_mode) == 0o600
+
+    async def test_async_spill_serializes_off_loop(self, tmp_path):
+        """Test that aset/aget pack and unpack spilled profiles in a thread."""
+        cache = ProfileCache(maxsize=1, spill_path=tmp_path / "profiles.db")
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def record(func):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return func(*args)
+            return wrapper
+
+        with (
+            mock.patch.object(cache_module, "_pack_row", record(cache_module._pack_row)),
+            mock.patch.object(cache_module, "_unpack", record(cache_module._unpack)),
+        ):
+            await cache.aset("a", make_profile("a"))
+            await cache.aset("b", make_profile("b"))
+            loaded = await cache.aget("a")
+
+        assert loaded is not None
+        assert loaded.profile_id == "a"
+        assert len(threads) == 3
+        assert loop_thread not in threads
+        assert await cache.aget("missing") is None
+
+    def test_spill_stores_compressed_json(self, tmp_path):
+        """Test that spilled profiles are stored as compressed JSON."""
+        cache = ProfileCache(spill_path=tmp_path / "profiles.db")
+        profile = make_profile("a")
+        cache["a"] = profile
+
+        assert cache._db is not None
+        (data,) = cache._db.execute("SELECT data FROM profiles").fetchone()
+        assert zlib.decompress(data) == profile.model_dump_json().encode()
+
+    def test_get_head_skips_line_data_for_spilled(self, tmp_path):
+        """Test that spilled profiles are read back without per-file data."""
+        cache = ProfileCache(maxsize=1, spill_path=tmp_path / "profiles.db")
+        profile = make_profile("a")
+        profile.files["main.py"] = FileMetrics(
+            filename="main.py", total_cpu_percent=1.0
+        )
+        cache["a"] = profile
+        assert cache.get_head("a") is profile
+
+        cache["b"] = make_profile("b")
+        head = cache.get_head("a")
+        assert head is not None
+        assert head.summary == profile.summary
+        assert head.files == {}
+        assert list(cache._data) == ["b"]
+        assert cache.get_head("missing") is None
+
+    async def test_aget_head_matches_get_head(self, tmp_path):
+        """Test that the async head lookup decodes the same light profile."""
+        cache = ProfileCache(maxsize=1, spill_path=tmp_path / "profiles.db")
+        await cache.aset("a", make_profile("a"))
+        await cache.aset("b", make_profile("b"))
+
+        head = await cache.aget_head("a")
+        assert head == cache.get_head("a")
+        assert head is not None
+        assert head.files == {}
+        assert await cache.aget_head("missing") is None
+
+    async def test_spill_reloads_unvalidated_lines(self, tmp_path):
+        """Test that out-of-range values the parser kept survive a reload."""
+        cache = ProfileCache(maxsize=1, spill_path=tmp_path / "profiles.db")
+        profile = make_profile("a")
+        line = LineMetrics.model_construct(lineno=1, line="x", cpu_utilization=1.2)
+        leak = MemoryLeak.model_construct(
+            filename="main.py", lineno=1, line="x", likelihood=1.5, velocity_mb_s=1.0
+        )
+        profile.files["main.py"] = FileMetrics(
+            filename="main.py", lines=[line], leaks=[leak]
+        )
+        profile.summary.detected_leaks.append(leak)
+        await cache.aset("a", profile)
+        await cache.aset("b", make_profile("b"))
+
+        loaded = await cache.aget("a")
+        head = await cache.aget_head("a")
+
+        assert loaded is not None
+        assert loaded.files["main.py"].lines[0].cpu_utilization == 1.2
+        assert loaded.summary.detected_leaks[0].likelihood == 1.5
+        assert head is not None
+        assert head.summary.detected_leaks[0].likelihood == 1.5
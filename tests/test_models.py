@@ -38,6 +38,20 @@ class TestLineMetrics:
         )
         assert line.total_cpu_percent == 18.0
 
+    def test_total_cpu_percent_not_serialized(self):
+        """Test that the computed total stays out of model_dump output."""
+        line = LineMetrics(lineno=10, line="x = 1", cpu_percent_python=10.0)
+        assert line.total_cpu_percent == 10.0
+        assert "total_cpu_percent" not in line.model_dump()
+        assert LineMetrics(**line.model_dump()) == line
+
+    def test_total_cpu_percent_follows_model_copy(self):
+        """Test that the total reflects fields updated by model_copy."""
+        line = LineMetrics(lineno=10, line="x = 1", cpu_percent_python=10.0)
+        assert line.total_cpu_percent == 10.0
+        updated = line.model_copy(update={"cpu_percent_c": 5.0})
+        assert updated.total_cpu_percent == 15.0
+
     def test_validation_cpu_range(self):
         """Test that CPU percentages must be 0-100."""
         with pytest.raises(ValidationError):
@@ -278,3 +278,60 @@ async def test_parse_json_without_profile_id(parser: ProfileParser):
     })
     
     result = parser.parse_json(json_str)
+
+
+@pytest.mark.asyncio
+async def test_parse_validated_matches_trusted(
+    parser: ProfileParser, profiles_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that the validated path produces the same result as the trusted path"""
+    profile_path = profiles_dir / "memory_leak.json"
+
+    trusted = parser.parse_file(profile_path)
+    monkeypatch.setattr("scalene_mcp.parser._TRUSTED", False)
+    validated = parser.parse_file(profile_path)
+
+    for filename, file_metrics in validated.files.items():
+        assert file_metrics.lines == trusted.files[filename].lines
+        assert file_metrics.leaks == trusted.files[filename].leaks
+
+
+@pytest.mark.asyncio
+async def test_parse_file_with_mixed_output(
+    parser: ProfileParser, profiles_dir: Path, tmp_path: Path
+):
+    """Test parsing a file where script output precedes the JSON"""
+    raw = (profiles_dir / "simple_cpu.json").read_text()
+    mixed_file = tmp_path / "mixed.json"
+    mixed_file.write_text("fib(30) = 832040\n" + raw)
+
+    result = parser.parse_file(mixed_file)
+
+    assert isinstance(result, ProfileResult)
+    assert result.raw_json_path == str(mixed_file)
+    assert len(result.files) > 0
+
+
+@pytest.mark.asyncio
+async def test_parse_shares_repeated_source_lines(parser: ProfileParser):
+    """Test identical source lines share one string object"""
+    text = "    result = compute_something(" + "argument, " * 8 + ")"
+    line = {"lineno": 1, "line": text}
+    json_str = json.dumps({
+        "elapsed_time_sec": 1.0,
+        "files": {
+            "a.py": {"lines": [line, {**line, "lineno": 2}]},
+            "b.py": {"lines": [line]},
+        },
+    })
+
+    result = parser.parse_json(json_str)
+
+    a_lines = result.files["a.py"].lines
+    assert a_lines[0].line == text
+    assert a_lines[0].line is a_lines[1].line
+    assert result.files["b.py"].lines[0].line is a_lines[0].line
+
+    # Sharing is per profile, so another parse keeps its own copy
+    again = parser.parse_json(json_str)
+    assert again.files["a.py"].lines[0].line is not a_lines[0].line
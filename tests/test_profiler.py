@@ -7,8 +7,23 @@ from pathlib import Path
 
 import pytest
 
-from scalene_mcp.models import ProfileResult
-from scalene_mcp.profiler import ScaleneProfiler
+from scalene_mcp.analyzer import ProfileAnalyzer
+from scalene_mcp.models import (
+    FileMetrics,
+    LineMetrics,
+    MemoryLeak,
+    ProfileResult,
+    ProfileSummary,
+)
+from scalene_mcp.parser import ProfileParser
+from scalene_mcp.profiler import (
+    _STDERR_TAIL_BYTES,
+    ScaleneProfiler,
+    _build_command,
+    _drain_stream,
+    _drop_minor_lines,
+    _normalize_path_list,
+)
 
 
 @pytest.fixture
@@ -392,3 +407,140 @@ async def test_profile_no_cpu_no_memory(profiler: ScaleneProfiler, fibonacci_pat
     
     assert isinstance(result, ProfileResult)
 
+
+@pytest.mark.asyncio
+async def test_drain_stream_keeps_bounded_tail():
+    """Test that stderr draining keeps the last bytes across many small reads"""
+    stream = asyncio.StreamReader()
+    traceback = b"".join(
+        b'  File "app.py", line %d, in f%d\n' % (i, i) for i in range(100)
+    ) + b"RuntimeError: boom\n"
+
+    async def feed():
+        # Line-buffered stderr arrives a line at a time
+        for i in range(10_000):
+            stream.feed_data(b"progress %d\n" % i)
+            await asyncio.sleep(0)
+        for line in traceback.splitlines(keepends=True):
+            stream.feed_data(line)
+            await asyncio.sleep(0)
+        stream.feed_eof()
+
+    tail = bytearray()
+    await asyncio.gather(feed(), _drain_stream(stream, tail))
+
+    assert len(tail) <= _STDERR_TAIL_BYTES
+    assert tail.endswith(traceback)
+
+
+def test_build_command_only_passes_non_defaults():
+    """Test that argv contains flags only for options that differ from defaults"""
+    options = {
+        "cpu": True,
+        "memory": False,
+        "gpu": False,
+        "cpu_only": False,
+        "stacks": True,
+        "use_virtual_time": False,
+        "cpu_sampling_rate": 0.01,
+        "cpu_percent_threshold": 5.0,
+        "malloc_threshold": 100,
+        "allocation_sampling_window": 10485767,
+        "profile_all": False,
+        "profile_only": "myapp",
+        "profile_exclude": "",
+        "memory_leak_detector": True,
+        "reduced_profile": False,
+    }
+
+    cmd = _build_command(Path("app.py"), Path("out.json"), options, ["--n", "5"])
+
+    assert cmd[:4] == ["python", "-m", "scalene", "run"]
+    assert cmd[cmd.index("--outfile") + 1] == "out.json"
+    assert "--no-memory" in cmd
+    assert "--stacks" in cmd
+    assert "--no-cpu" not in cmd
+    assert "--cpu-sampling-rate" not in cmd
+    assert cmd[cmd.index("--cpu-percent-threshold") + 1] == "5.0"
+    assert cmd[cmd.index("--profile-only") + 1] == "myapp"
+    assert "--profile-exclude" not in cmd
+    assert cmd[-4:] == ["app.py", "---", "--n", "5"]
+
+
+def test_normalize_path_list():
+    """Test that path filters lose stray spaces and empty entries"""
+    assert _normalize_path_list(" test, vendor ,") == "test,vendor"
+    assert _normalize_path_list(",") == ""
+    assert _normalize_path_list("myapp") == "myapp"
+
+
+def test_drop_minor_lines(simple_cpu_profile_json: Path):
+    """Test that reduced profiles keep only lines above a threshold"""
+    profile = ProfileParser().parse_file(simple_cpu_profile_json)
+    lines_before = sum(len(f.lines) for f in profile.files.values())
+
+    _drop_minor_lines(profile, cpu_percent_threshold=5.0, malloc_threshold=100)
+
+    kept = [line for f in profile.files.values() for line in f.lines]
+    assert 0 < len(kept) < lines_before
+    assert all(
+        line.total_cpu_percent >= 5.0
+        or line.memory_alloc_count >= 100
+        or line.memory_peak_mb > 0
+        or line.memory_alloc_mb > 0
+        or line.gpu_percent > 0
+        for line in kept
+    )
+    assert profile.summary.lines_profiled == lines_before
+
+
+def test_drop_minor_lines_keeps_memory_gpu_and_leak_lines():
+    """Test that low-CPU lines with memory, GPU or leak data survive reduction"""
+    leak = MemoryLeak(
+        filename="app.py",
+        lineno=3,
+        line="cache.append(x)",
+        likelihood=0.9,
+        velocity_mb_s=1.0,
+    )
+    lines = [
+        # Huge allocation in few sampled mallocs, little CPU
+        LineMetrics(
+            lineno=1,
+            line="big = bytearray(2**31)",
+            cpu_percent_python=0.3,
+            memory_peak_mb=1900.0,
+            memory_alloc_mb=1900.0,
+            memory_alloc_count=3,
+        ),
+        LineMetrics(lineno=2, line="model(x)", cpu_percent_python=0.2, gpu_percent=85.0),
+        LineMetrics(lineno=3, line="cache.append(x)"),
+        LineMetrics(lineno=4, line="pass", cpu_percent_python=0.1),
+    ]
+    profile = ProfileResult(
+        profile_id="p",
+        timestamp=0.0,
+        summary=ProfileSummary(
+            profile_id="p",
+            timestamp=0.0,
+            elapsed_time_sec=1.0,
+            max_memory_mb=1900.0,
+            total_allocations_mb=0.0,
+            allocation_count=0,
+            total_cpu_samples=0,
+            python_time_percent=100.0,
+            native_time_percent=0.0,
+            system_time_percent=0.0,
+            files_profiled=["app.py"],
+            lines_profiled=4,
+            detected_leaks=[leak],
+        ),
+        files={"app.py": FileMetrics(filename="app.py", lines=lines, leaks=[leak])},
+        scalene_version="1.0.0",
+    )
+
+    _drop_minor_lines(profile, cpu_percent_threshold=1.0, malloc_threshold=100)
+
+    assert [line.lineno for line in profile.files["app.py"].lines] == [1, 2, 3]
+    hotspots = ProfileAnalyzer().get_top_memory_hotspots(profile)
+    assert [h.lineno for h in hotspots] == [1]
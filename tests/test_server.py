@@ -1,11 +1,16 @@
 """Tests for FastMCP server tools."""
 
+import asyncio
+import sys
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from scalene_mcp.analyzer import ProfileAnalyzer
 from scalene_mcp.parser import ProfileParser
 from scalene_mcp.server import (
+    _MAX_MEMOIZED,
+    analyze,
     analyze_profile,
     compare_profiles,
     get_bottlenecks,
@@ -15,8 +20,10 @@ from scalene_mcp.server import (
     get_gpu_hotspots,
     get_memory_hotspots,
     get_memory_leaks,
+    get_project_root,
     get_recommendations,
     list_profiles,
+    list_project_files,
     profile_code,
     profile_script,
     recent_profiles,
@@ -79,6 +86,71 @@ class TestProfileScript:
         assert "text_summary" in result
         assert result["profile_id"] in recent_profiles
 
+    async def test_profile_without_text_summary(self, simple_cpu_profile_json):
+        """Test skipping the text summary and fetching it on demand."""
+        parser = ProfileParser()
+        profile = parser.parse_file(simple_cpu_profile_json)
+
+        with patch("scalene_mcp.profiler.ScaleneProfiler.profile_script", new_callable=AsyncMock) as mock_profile:
+            mock_profile.return_value = profile
+            result = await profile_script(
+                str(simple_cpu_profile_json), include_text_summary=False
+            )
+
+        assert result["text_summary"] == ""
+        summary = await analyze(result["profile_id"], metric_type="summary")
+        assert summary["data"]
+
+    async def test_concurrent_identical_requests_share_run(
+        self, simple_cpu_profile_json
+    ):
+        """Test identical concurrent profile requests launch Scalene once."""
+        parser = ProfileParser()
+        profile = parser.parse_file(simple_cpu_profile_json)
+
+        async def slow_profile(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return profile
+
+        with patch("scalene_mcp.profiler.ScaleneProfiler.profile_script", new_callable=AsyncMock) as mock_profile:
+            mock_profile.side_effect = slow_profile
+            first, second = await asyncio.gather(
+                profile_script(str(simple_cpu_profile_json)),
+                profile_script(str(simple_cpu_profile_json)),
+            )
+            await profile_script(str(simple_cpu_profile_json), cpu_only=True)
+
+        assert first["profile_id"] == second["profile_id"]
+        assert mock_profile.await_count == 2
+
+    async def test_cancelled_caller_leaves_run_joinable(
+        self, simple_cpu_profile_json
+    ):
+        """Test a request cancelled mid-run does not cause a second run."""
+        parser = ProfileParser()
+        profile = parser.parse_file(simple_cpu_profile_json)
+        release = asyncio.Event()
+
+        async def slow_profile(*args, **kwargs):
+            await release.wait()
+            return profile
+
+        with patch("scalene_mcp.profiler.ScaleneProfiler.profile_script", new_callable=AsyncMock) as mock_profile:
+            mock_profile.side_effect = slow_profile
+            first = asyncio.ensure_future(profile_script(str(simple_cpu_profile_json)))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+
+            second = asyncio.ensure_future(profile_script(str(simple_cpu_profile_json)))
+            await asyncio.sleep(0)
+            release.set()
+            result = await second
+
+        assert result["profile_id"] == profile.profile_id
+        assert mock_profile.await_count == 1
+
     async def test_profile_with_args(self, simple_cpu_profile_json):
         """Test profiling with script arguments."""
         parser = ProfileParser()
@@ -191,6 +263,44 @@ class TestAnalyzeProfile:
         assert "hotspots" in result
         assert "recommendations" in result
 
+    async def test_repeat_analysis_reuses_result(self, simple_profile_id):
+        """Test that the same query on one profile is only computed once."""
+        first = await analyze(simple_profile_id, metric_type="all")
+        second = await analyze(simple_profile_id, metric_type="all")
+        other = await analyze(simple_profile_id, metric_type="all", top_n=3)
+
+        assert second["data"] is first["data"]
+        assert other["data"] is not first["data"]
+
+    async def test_memoized_results_are_bounded(self, simple_profile_id):
+        """Test that each profile keeps only a bounded set of memoized results."""
+        profile = recent_profiles[simple_profile_id]
+        for top_n in range(1, _MAX_MEMOIZED + 10):
+            await analyze(simple_profile_id, metric_type="cpu", top_n=top_n)
+        filename = next(iter(profile.files))
+        await analyze(simple_profile_id, metric_type="file", filename=filename)
+
+        assert len(profile._dump_cache) == _MAX_MEMOIZED
+        assert ("cpu", _MAX_MEMOIZED + 9) in profile._dump_cache
+        assert not any(key[0] == "file" for key in profile._dump_cache)
+
+    async def test_report_bundles_hotspots_and_bottlenecks(self, simple_profile_id):
+        """Test the report metric returns every hotspot set in one call."""
+        report = await analyze(simple_profile_id, metric_type="report", top_n=5)
+        cpu = await analyze(simple_profile_id, metric_type="cpu", top_n=5)
+
+        assert set(report["data"]) == {"cpu", "memory", "gpu", "bottlenecks"}
+        assert report["data"]["cpu"] is cpu["data"]
+
+    async def test_report_looks_up_profile_once(self, simple_profile_id):
+        """Test the report reuses one profile lookup for every part."""
+        with patch.object(
+            recent_profiles, "aget", wraps=recent_profiles.aget
+        ) as aget:
+            await analyze(simple_profile_id, metric_type="report")
+
+        aget.assert_awaited_once()
+
 
 class TestGetCpuHotspots:
     """Tests for get_cpu_hotspots tool."""
@@ -217,6 +327,15 @@ class TestGetCpuHotspots:
         assert isinstance(hotspots, list)
         assert len(hotspots) <= 5
 
+    async def test_hotspot_data_matches_model_dump(self, simple_profile_id):
+        """Test the fast hotspot dump matches pydantic's model_dump."""
+        result = await analyze(simple_profile_id, metric_type="cpu", top_n=5)
+        profile = recent_profiles[simple_profile_id]
+        hotspots = ProfileAnalyzer().get_top_cpu_hotspots(profile, n=5)
+
+        assert result["data"]
+        assert result["data"] == [h.model_dump() for h in hotspots]
+
 
 class TestGetMemoryHotspots:
     """Tests for get_memory_hotspots tool."""
@@ -305,6 +424,15 @@ class TestGetMemoryLeaks:
 
         assert isinstance(leaks, list)
 
+    async def test_leak_data_matches_model_dump(self, memory_leak_profile_id):
+        """Test the fast leak dump matches pydantic's model_dump."""
+        result = await analyze(memory_leak_profile_id, metric_type="leaks")
+        profile = recent_profiles[memory_leak_profile_id]
+
+        assert result["data"] == [
+            leak.model_dump() for leak in profile.summary.detected_leaks
+        ]
+
 
 class TestCompareProfiles:
     """Tests for compare_profiles tool."""
@@ -356,6 +484,16 @@ class TestGetFileDetails:
         with pytest.raises(ValueError, match="File not in profile"):
             await get_file_details(simple_profile_id, "nonexistent.py")
 
+    async def test_missing_file_lists_capped_names(self, simple_profile_id):
+        """Test the missing-file error names at most a few available files."""
+        profile = recent_profiles[simple_profile_id]
+        template = next(iter(profile.files.values()))
+        many = {f"mod_{i}.py": template for i in range(30)}
+        recent_profiles[simple_profile_id] = profile.model_copy(update={"files": many})
+
+        with pytest.raises(ValueError, match=r"Available \(30\): mod_0\.py, .*\(\+10 more\)"):
+            await analyze(simple_profile_id, metric_type="file", filename="nope.py")
+
     async def test_get_file_details(self, simple_profile_id):
         """Test getting file details."""
         # Get profile to check available files
@@ -527,3 +665,45 @@ class TestToolIntegration:
         await get_function_summary(profile_id)
 
         # All should succeed without errors
+
+
+class TestGetProjectRoot:
+    """Tests for get_project_root tool."""
+
+    async def test_markers_refresh_when_directory_changes(self, tmp_path):
+        """Test cached marker scans are redone once the root changes."""
+        # The package re-exports the FastMCP instance as ``scalene_mcp.server``
+        server_module = sys.modules["scalene_mcp.server"]
+        with patch.object(server_module, "_project_root", tmp_path):
+            result = await get_project_root()
+            assert result["type"] == "unknown"
+            assert result["markers_found"] == "none"
+
+            (tmp_path / "pyproject.toml").write_text("")
+            (tmp_path / ".git").mkdir()
+            result = await get_project_root()
+            assert result["type"] == "python"
+            assert result["markers_found"] == "pyproject.toml, .git"
+
+
+class TestListProjectFiles:
+    """Tests for list_project_files tool."""
+
+    async def test_prunes_excluded_dirs_and_depth(self, tmp_path):
+        """Test excluded directories and files past max_depth are skipped."""
+        for rel in ["main.py", "src/app.py", "src/pkg/deep.py", ".venv/lib/x.py", "notes.txt"]:
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("")
+
+        server_module = sys.modules["scalene_mcp.server"]
+        with patch.object(server_module, "_project_root", tmp_path):
+            assert await list_project_files(max_depth=2) == ["main.py", "src/app.py"]
+            assert await list_project_files("src/**", max_depth=3) == [
+                "src/app.py",
+                "src/pkg/deep.py",
+            ]
+            assert await list_project_files("src/*.py") == ["src/app.py"]
+            assert await list_project_files("src/**/*.py", max_depth=2) == [
+                "src/app.py"
+            ]
+            assert await list_project_files(".venv/**") == []